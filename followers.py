@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import re
+from typing import Optional
+
+import requests
+
+# Follower count in the JSON data embedded in server-rendered company pages
+_FOLLOWER_COUNT_JSON_RE = re.compile(r'"followerCount"\s*:\s*(\d+)')
+# The number and optional K/M/B suffix right before "followers", e.g. "12,345 followers" or "1.2K followers"
+_FOLLOWER_TEXT_RE = re.compile(r'(\d[\d.,]*)\s*([kmb]?)\+?\s+followers', re.IGNORECASE)
+_MULTIPLIERS = {'': 1, 'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000}
+
+
+def parse_follower_text(text: str) -> Optional[int]:
+    """
+    Parses text like "1.2K followers" or "100M followers" into an integer.
+    Returns None if the text holds no follower count.
+    """
+    match = _FOLLOWER_TEXT_RE.search(text)
+    if not match:
+        return None
+    try:
+        number = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+    return int(number * _MULTIPLIERS[match.group(2).lower()])
+
+
+def fetch_followers_via_http(company_url: str, session: requests.Session) -> Optional[int]:
+    """
+    Reads a company's follower count from its server-rendered public page with a plain
+    GET, without starting a browser. Returns None if the count can't be found.
+    """
+    try:
+        response = session.get(company_url, timeout=10)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"    - HTTP lookup failed for {company_url}: {e}")
+        return None
+    match = _FOLLOWER_COUNT_JSON_RE.search(response.text)
+    if match:
+        return int(match.group(1))
+    return parse_follower_text(response.text)
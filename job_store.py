@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import re
+import sqlite3
+import time
+from typing import Iterable, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+import msgspec
+
+# The numeric posting id at the end of a job link, e.g. /jobs/view/python-developer-at-acme-4012345678
+_JOB_ID_RE = re.compile(r'/jobs/view/(?:[^/]*-)?(\d+)/?$')
+
+
+def job_key(url: str) -> str:
+    """
+    Reduces a job link to a key that is stable across searches: the posting's numeric
+    id, or else the URL without its per-search query (refId, trackingId, trk, ...).
+    """
+    parts = urlsplit(url)
+    id_match = _JOB_ID_RE.search(parts.path)
+    if id_match:
+        return id_match.group(1)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/'), '', ''))
+
+
+class JobStore:
+    """
+    SQLite-backed record of job postings seen in previous runs, keyed by job_key(url),
+    so repeated searches only process postings that are new.
+    """
+    def __init__(self, path: str = "jobs.sqlite"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs(job_key TEXT PRIMARY KEY, url TEXT, data JSON, fetched_at INTEGER)"
+        )
+
+    def known_urls(self, urls: Iterable[str], since: Optional[float] = None) -> Set[str]:
+        """
+        Returns the subset of `urls` whose posting is already stored. If `since` (a Unix
+        timestamp) is given, only jobs fetched at or after that time count as known.
+        """
+        keys = {}
+        for url in urls:
+            if url:
+                keys.setdefault(job_key(url), []).append(url)
+        if not keys:
+            return set()
+        placeholders = ",".join("?" * len(keys))
+        query = f"SELECT job_key FROM jobs WHERE job_key IN ({placeholders})"
+        params = list(keys)
+        if since is not None:
+            query += " AND fetched_at >= ?"
+            params.append(int(since))
+        return {url for (key,) in self.conn.execute(query, params) for url in keys[key]}
+
+    def add(self, jobs: Iterable) -> None:
+        """Records jobs as seen now (jobs without a URL are skipped)."""
+        now = int(time.time())
+        rows = [
+            (job_key(job.url), job.url, msgspec.json.encode(job).decode('utf-8'), now)
+            for job in jobs if job.url
+        ]
+        # Replace so a job that fell outside a previous `since` window is refreshed
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO jobs(job_key, url, data, fetched_at) VALUES (?, ?, ?, ?)", rows)
+
+    def close(self):
+        """Closes the database connection."""
+        self.conn.close()
@@ -6,22 +6,78 @@ from LinkedIn's guest-facing API, reusing a single Selenium session.
 """
 
 # --- 1. Dependencies ---
-# pip install requests beautifulsoup4 pandas openpyxl selenium
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Optional, TypedDict
+# pip install aiohttp Brotli requests selectolax lxml msgspec diskcache openpyxl selenium
+import argparse
+import asyncio
+import aiohttp
+from lxml import etree
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # Fall back to lxml if selectolax isn't installed
+    LexborHTMLParser = None
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Union
 import csv
-import pandas as pd
+import diskcache
+import functools
+import io
+import itertools
 import math
+import msgspec
+import operator
+import requests
 import time
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium_manager import SeleniumManager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit
+from followers import fetch_followers_via_http
+from job_store import JobStore
+from rate_limiter import RateLimiter, backoff_delay
+
+if TYPE_CHECKING:  # Selenium is only imported when enrichment actually needs a browser
+    from selenium_manager import SeleniumManager
+
+# --- 2. Configuration ---
+JOBS_API_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+PAGE_SIZE = 25
+MAX_CONCURRENT_REQUESTS = 8
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 30.0 # Seconds; also caps delays the server asks for
+REQUESTS_PER_MINUTE = 30
+FOLLOWER_WORKERS = 3
+FOLLOWER_HTTP_WORKERS = 8 # Plain HTTP lookups are cheap, so they run wider than the browser pool
+FOLLOWER_CACHE_DIR = '.follower_cache'
+FOLLOWER_CACHE_TTL = 7 * 24 * 60 * 60  # Re-scrape follower counts after a week
+JOB_STORE_PATH = 'jobs.sqlite'
+
+_COMPANY_SLUG_RE = re.compile(r'/company/([^/]+)')
+# X-RateLimit-Reset values above this are Unix timestamps (2001-09-09); smaller ones are deltas
+_EPOCH_THRESHOLD = 1_000_000_000
 
-# --- 2. Type Definitions ---
-class JobData(TypedDict):
+# lxml fallback parser: the page is parsed incrementally, each card's fields are collected
+# in a single walk of its subtree as soon as the card is complete, then the card is freed.
+# Skipping comments, blank text and the id index trims per-page work. iterparse builds
+# its own parser per page, so there's no shared parser as before; building one costs ~1 µs
+# against ~0.5 ms to parse a page, and a per-page parser holds no state between pages.
+_ITERPARSE_OPTIONS = dict(
+    events=('end',), tag='div', html=True, encoding='utf-8',
+    remove_comments=True, remove_blank_text=True, collect_ids=False,
+)
+_CARD_CLASS = 'base-search-card'
+_CARD_FIELD_TAGS = ('h3', 'h4', 'span', 'a', 'time', 'img')
+_CARD_FIELDS = {
+    ('h3', 'base-search-card__title'): 'title',
+    ('h4', 'base-search-card__subtitle'): 'company',
+    ('span', 'job-search-card__location'): 'location',
+    ('a', 'base-card__full-link'): 'url',
+    ('time', 'job-search-card__listdate'): 'date',
+    ('img', 'artdeco-entity-image'): 'logo',
+}
+
+# --- 3. Type Definitions ---
+class JobData(msgspec.Struct, gc=False): # Only holds str/int/None, so GC tracking isn't needed
     title: Optional[str]
     company_name: Optional[str]
     company_url: Optional[str]
@@ -32,147 +88,477 @@ class JobData(TypedDict):
     date_posted_iso: Optional[str]
     company_logo_url: Optional[str]
 
+JOB_DATA_FIELDS = JobData.__struct_fields__
+
 # --- 4. Core Functions ---
-def enrich_jobs_with_followers(jobs_list: List[JobData], selenium_manager: SeleniumManager) -> List[JobData]:
+@functools.lru_cache(maxsize=4096)
+def _normalize_company_url(company_url: str) -> str:
+    """
+    Reduces a company URL to a canonical key. LinkedIn company links become
+    https://www.linkedin.com/company/<slug>, whatever the subdomain or subpage; other
+    URLs just lose their tracking query (?trk=...), fragment and trailing slash.
+    """
+    parts = urlsplit(company_url)
+    slug_match = _COMPANY_SLUG_RE.match(parts.path)
+    if slug_match and parts.netloc.lower().endswith('linkedin.com'):
+        return f"https://www.linkedin.com/company/{slug_match.group(1).lower()}"
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/'), '', ''))
+
+
+def enrich_jobs_with_followers(jobs_list: List[JobData], selenium_manager_factory: Callable[[int], 'SeleniumManager']) -> List[JobData]:
     """
-    Enriches job data with company follower counts using a reusable Selenium session.
+    Enriches job data with company follower counts. Counts are served from an on-disk
+    cache when possible, then read from the public company pages over plain HTTP. A
+    SeleniumManager is only started (via selenium_manager_factory, which is passed the
+    number of companies still missing a count) for those companies, and the lookups are
+    spread across its pool of browser sessions.
     """
-    company_followers_cache = {}
-    unique_company_urls = {job['company_url'] for job in jobs_list if job['company_url']}
+    # Keyed by normalized URL, so links to one company with different tracking params are fetched once
+    unique_company_urls = {_normalize_company_url(job.company_url) for job in jobs_list if job.company_url}
+    if not unique_company_urls:
+        print("\n🔎 No company URLs to enrich.")
+        return jobs_list
+
+    with diskcache.Cache(FOLLOWER_CACHE_DIR) as follower_cache:
+        company_followers_cache = {url: follower_cache.get(url) for url in unique_company_urls}
+        urls_to_scrape = [url for url, followers in company_followers_cache.items() if followers is None]
+
+        print(f"\n🔎 Found {len(unique_company_urls)} unique companies ({len(unique_company_urls) - len(urls_to_scrape)} cached). Fetching follower counts...")
+
+        if urls_to_scrape:
+            rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, 60)
+
+            def fetch(indexed_url):
+                i, url = indexed_url
+                rate_limiter.wait()
+                print(f"  - Fetching ({i+1}/{len(urls_to_scrape)}): {url}")
+                return fetch_followers_via_http(url, session)
 
-    print(f"\n🔎 Found {len(unique_company_urls)} unique companies. Fetching follower counts...")
+            with requests.Session() as session:
+                session.headers.update({'User-Agent': USER_AGENT})
+                # One pooled keep-alive connection per worker thread
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=FOLLOWER_HTTP_WORKERS)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                with ThreadPoolExecutor(max_workers=FOLLOWER_HTTP_WORKERS) as executor:
+                    for url, followers in zip(urls_to_scrape, executor.map(fetch, enumerate(urls_to_scrape))):
+                        if followers is not None:
+                            company_followers_cache[url] = followers
+                            follower_cache.set(url, followers, expire=FOLLOWER_CACHE_TTL)
+            urls_to_scrape = [url for url in urls_to_scrape if company_followers_cache[url] is None]
 
-    for i, url in enumerate(unique_company_urls):
-        print(f"  - Scraping ({i+1}/{len(unique_company_urls)}): {url}")
-        followers = selenium_manager.get_followers(url)
-        company_followers_cache[url] = followers
-        time.sleep(2) # Be respectful between requests
+        if urls_to_scrape:
+            print(f"\n🌐 {len(urls_to_scrape)} companies need a browser. Starting Selenium...")
 
+            def scrape(indexed_url):
+                i, url = indexed_url
+                print(f"  - Scraping ({i+1}/{len(urls_to_scrape)}): {url}")
+                return selenium_manager.get_followers_pooled(url)
+
+            selenium_manager = selenium_manager_factory(len(urls_to_scrape))
+            try:
+                # Lookups are network-bound, so threads overlap the page loads; the manager rate-limits them
+                with ThreadPoolExecutor(max_workers=selenium_manager.pool_size) as executor:
+                    for url, followers in zip(urls_to_scrape, executor.map(scrape, enumerate(urls_to_scrape))):
+                        company_followers_cache[url] = followers
+                        if followers is not None:
+                            follower_cache.set(url, followers, expire=FOLLOWER_CACHE_TTL)
+            finally:
+                # Ensure the browser sessions are always closed
+                selenium_manager.close()
+
+    get_followers = company_followers_cache.get # Bound once, not looked up per job
     for job in jobs_list:
-        job['company_followers_number'] = company_followers_cache.get(job['company_url'])
+        if job.company_url:
+            job.company_followers_number = get_followers(_normalize_company_url(job.company_url))
 
     print("✅ Enrichment complete.")
     return jobs_list
 
 
-def fetch_linkedin_jobs(keywords: str, location: str, limit: int = 50, f_TPR: str = "") -> List[JobData]:
-    """Fetches job listings from LinkedIn using requests."""
-    all_jobs: List[JobData] = []
-    pages_to_fetch = math.ceil(limit / 25)
-    print(f"🎯 Goal: Fetch {limit} jobs via API. This will require up to {pages_to_fetch} pages.")
-    # (The rest of this function is unchanged)
-    page_num = 0
-    while True:
-        start = page_num * 25
-        base_url = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
-        params = {'keywords': keywords, 'location': location, 'start': start, 'f_TPR': f_TPR}
-        print(f"📄 Fetching page {page_num + 1} (starting at job {start})...")
+def _retry_after_delay(headers) -> Optional[float]:
+    """
+    Reads how long the server asked us to wait from Retry-After or X-RateLimit-Reset,
+    capped at MAX_RETRY_DELAY. Returns None if neither gives a positive delay.
+    """
+    delay = None
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        if retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                pass
+    rate_limit_reset = headers.get('X-RateLimit-Reset')
+    if (delay is None or delay <= 0) and rate_limit_reset:
+        try:
+            reset = float(rate_limit_reset)
+        except ValueError:
+            pass
+        else:
+            # Either a Unix timestamp or, from some servers, seconds until the reset
+            delay = reset - time.time() if reset > _EPOCH_THRESHOLD else reset
+    if delay is None or delay <= 0:
+        return None # Let the caller fall back to its own backoff
+    return min(delay, MAX_RETRY_DELAY)
+
+
+async def _get_with_retry(session: aiohttp.ClientSession, url: str, params: dict,
+                          rate_limiter: RateLimiter, max_retries: int = MAX_RETRIES) -> Optional[bytes]:
+    """
+    Issues a rate-limited GET, retrying network errors and HTTP 429/5xx responses with
+    exponential backoff. Returns None once all retries are exhausted.
+    """
+    for attempt in range(max_retries):
+        await rate_limiter.wait_async()
+        delay = None
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(base_url, params=params, headers=headers, timeout=10)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+            async with session.get(url, params=params) as response:
+                if response.status != 429 and response.status < 500:
+                    response.raise_for_status()
+                    # Raw bytes go straight to the parser, which decodes UTF-8 in C
+                    return await response.read()
+                error = f"HTTP {response.status}"
+                delay = _retry_after_delay(response.headers)
+        except aiohttp.ClientResponseError:
+            raise # Other 4xx responses won't succeed on retry
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+
+        if attempt < max_retries - 1:
+            if delay is None:
+                delay = backoff_delay(attempt, MAX_RETRY_DELAY)
+            print(f"    - {error} on attempt {attempt + 1}/{max_retries} (start={params['start']}). Retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+    return None
+
+
+async def _fetch_page(session: aiohttp.ClientSession, semaphore: asyncio.BoundedSemaphore,
+                      rate_limiter: RateLimiter, params: dict, page_num: int) -> Optional[bytes]:
+    """Fetches a single page of job search results, returning None on failure."""
+    async with semaphore:
+        print(f"📄 Fetching page {page_num + 1} (starting at job {params['start']})...")
+        try:
+            html_content = await _get_with_retry(session, JOBS_API_URL, params, rate_limiter)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            html_content = None
             print(f"❌ An error occurred during API request on page {page_num + 1}: {e}")
-            break
-        newly_parsed_jobs = parse_linkedin_jobs(response.text)
+        else:
+            if html_content is None:
+                print(f"❌ Giving up on page {page_num + 1} after {MAX_RETRIES} attempts.")
+        return html_content
+
+
+def _client_session() -> aiohttp.ClientSession:
+    """Opens an HTTP session for the job search API."""
+    # Keep connections (and resolved DNS) alive so later pages skip the TCP+TLS handshake
+    connector = aiohttp.TCPConnector(limit_per_host=MAX_CONCURRENT_REQUESTS, keepalive_timeout=30, ttl_dns_cache=300)
+    # Brotli/gzip-compressed responses cut the bytes on the wire several-fold
+    headers = {'User-Agent': USER_AGENT, 'Accept': 'text/html', 'Accept-Encoding': 'gzip, deflate, br'}
+    timeout = aiohttp.ClientTimeout(total=10)
+    return aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout)
+
+
+def _page_params(keywords: str, location: str, f_TPR: str, page_num: int) -> dict:
+    """Query parameters for one page of job search results."""
+    return {'keywords': keywords, 'location': location, 'start': page_num * PAGE_SIZE, 'f_TPR': f_TPR}
+
+
+async def _fetch_all(keywords: str, location: str, pages_to_fetch: int, f_TPR: str) -> List[Optional[bytes]]:
+    """Fetches all result pages concurrently, bounded by MAX_CONCURRENT_REQUESTS."""
+    semaphore = asyncio.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+    rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, 60)
+    async with _client_session() as session:
+        tasks = [
+            _fetch_page(session, semaphore, rate_limiter, _page_params(keywords, location, f_TPR, page_num), page_num)
+            for page_num in range(pages_to_fetch)
+        ]
+        return await asyncio.gather(*tasks)
+
+
+async def _fetch_new_jobs(keywords: str, location: str, pages_to_fetch: int, f_TPR: str,
+                          job_store: JobStore, since: Optional[float]) -> List[JobData]:
+    """
+    Fetches result pages one at a time, dropping jobs the job_store already holds, and
+    stops at the first page with nothing new so later pages are never requested.
+    """
+    semaphore = asyncio.BoundedSemaphore(1)
+    rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, 60)
+    new_jobs: List[JobData] = []
+    async with _client_session() as session:
+        for page_num in range(pages_to_fetch):
+            html_content = await _fetch_page(session, semaphore, rate_limiter, _page_params(keywords, location, f_TPR, page_num), page_num)
+            if html_content is None:
+                break
+            newly_parsed_jobs = parse_linkedin_jobs(html_content)
+            if not newly_parsed_jobs:
+                print("⏹️ No more jobs found from API. Stopping.")
+                break
+            known_urls = job_store.known_urls((job.url for job in newly_parsed_jobs), since)
+            newly_parsed_jobs = [job for job in newly_parsed_jobs if job.url not in known_urls]
+            if not newly_parsed_jobs:
+                print("⏹️ Every job on this page was seen in a previous run. Stopping.")
+                break
+            new_jobs.extend(newly_parsed_jobs)
+    return new_jobs
+
+
+def fetch_linkedin_jobs(keywords: str, location: str, limit: int = 50, f_TPR: str = "",
+                        job_store: Optional[JobStore] = None, since: Optional[float] = None) -> List[JobData]:
+    """
+    Fetches job listings from LinkedIn, requesting all pages concurrently. If a job_store
+    is given, jobs it already holds (fetched at or after `since`, if set) are skipped and
+    pages are requested one at a time, stopping at the first page with nothing new. The
+    caller records the returned jobs in the store once they have been exported.
+    """
+    all_jobs: List[JobData] = []
+    pages_to_fetch = math.ceil(limit / PAGE_SIZE)
+    print(f"🎯 Goal: Fetch {limit} jobs via API. This will require up to {pages_to_fetch} pages.")
+    if job_store:
+        return asyncio.run(_fetch_new_jobs(keywords, location, pages_to_fetch, f_TPR, job_store, since))[:limit]
+    pages = asyncio.run(_fetch_all(keywords, location, pages_to_fetch, f_TPR))
+    # Pages are processed in order so a failed or empty page still ends pagination
+    if None in pages:
+        pages = pages[:pages.index(None)]
+    # A page parses in well under a millisecond, so it's done inline (a process pool costs more than it saves)
+    for newly_parsed_jobs in map(parse_linkedin_jobs, pages):
         if not newly_parsed_jobs:
             print("⏹️ No more jobs found from API. Stopping.")
             break
         all_jobs.extend(newly_parsed_jobs)
-        if len(all_jobs) >= limit:
-            break
-        page_num += 1
-        time.sleep(1)
     return all_jobs[:limit]
 
 
-def parse_linkedin_jobs(html_content: str) -> List[JobData]:
+def parse_linkedin_jobs(html_content: Union[str, bytes]) -> List[JobData]:
     """Parses the raw HTML from the job search API response."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    job_cards = soup.find_all('div', class_='base-search-card')
-    extracted_jobs: List[JobData] = []
-    for card in job_cards:
-        # (Parsing logic is mostly the same, just adding the new field as None)
-        title_element = card.find('h3', class_='base-search-card__title')
-        title = title_element.get_text(strip=True) if title_element else None
-        company_element = card.find('h4', class_='base-search-card__subtitle')
+    return list(iter_linkedin_jobs(html_content))
+
+
+def iter_linkedin_jobs(html_content: Union[str, bytes]) -> Iterator[JobData]:
+    """
+    Lazily yields jobs from the raw HTML of a job search API response. Pass the response
+    bytes where possible; a str is encoded to UTF-8 once up front.
+    """
+    if isinstance(html_content, str):
+        html_content = html_content.encode('utf-8')
+    if LexborHTMLParser is None:
+        yield from _iter_linkedin_jobs_lxml(html_content)
+        return
+    tree = LexborHTMLParser(html_content)
+    for card in tree.css('div.base-search-card'):
+        title_element = card.css_first('h3.base-search-card__title')
+        title = title_element.text(strip=True) if title_element else None
+        link_element = card.css_first('h4.base-search-card__subtitle a')
         company_name, company_url = None, None
-        if company_element and company_element.find('a'):
-            link_element = company_element.find('a')
-            company_name = link_element.get_text(strip=True)
+        if link_element:
+            company_name = link_element.text(strip=True)
+            company_url = link_element.attributes.get('href')
+        location_element = card.css_first('span.job-search-card__location')
+        location = location_element.text(strip=True) if location_element else None
+        url_element = card.css_first('a.base-card__full-link')
+        url = url_element.attributes.get('href') if url_element else None
+        date_element = card.css_first('time.job-search-card__listdate')
+        date_posted_text = date_element.text(strip=True) if date_element else None
+        date_posted_iso = date_element.attributes.get('datetime') if date_element else None
+        logo_element = card.css_first('img.artdeco-entity-image')
+        company_logo_url = None
+        if logo_element:
+            attrs = logo_element.attributes
+            company_logo_url = attrs.get('data-delayed-url') or attrs.get('src')
+        job_data = JobData(
+            title=title, company_name=company_name, company_url=company_url,
+            company_followers_number=None, # Initialize as None
+            location=location, url=url, date_posted_text=date_posted_text,
+            date_posted_iso=date_posted_iso, company_logo_url=company_logo_url,
+        )
+        yield job_data
+
+
+def _find_card_fields(card: etree._Element) -> Dict[str, etree._Element]:
+    """
+    Maps each field name in _CARD_FIELDS to the first matching element in the card,
+    walking the card's subtree once instead of running one query per field.
+    """
+    found = {}
+    for element in card.iter(*_CARD_FIELD_TAGS):
+        class_attr = element.get('class')
+        if not class_attr:
+            continue
+        for class_name in class_attr.split():
+            field = _CARD_FIELDS.get((element.tag, class_name))
+            if field:
+                if field not in found:
+                    found[field] = element
+                break
+        if len(found) == len(_CARD_FIELDS):
+            break
+    return found
+
+
+def _node_text(node: etree._Element) -> str:
+    """Joins a node's stripped text fragments, matching selectolax's text(strip=True)."""
+    return ''.join(text.strip() for text in node.itertext())
+
+
+def _iter_linkedin_jobs_lxml(html_content: bytes) -> Iterator[JobData]:
+    """lxml fallback for iter_linkedin_jobs when selectolax is unavailable."""
+    if not html_content.strip():
+        return # lxml refuses to parse an empty document
+    for _, card in etree.iterparse(io.BytesIO(html_content), **_ITERPARSE_OPTIONS):
+        if _CARD_CLASS not in (card.get('class') or '').split():
+            continue
+        fields = _find_card_fields(card)
+        title_element = fields.get('title')
+        title = _node_text(title_element) if title_element is not None else None
+        company_element = fields.get('company')
+        link_element = next(company_element.iter('a'), None) if company_element is not None else None
+        company_name, company_url = None, None
+        if link_element is not None:
+            company_name = _node_text(link_element)
             company_url = link_element.get('href')
-        location_element = card.find('span', class_='job-search-card__location')
-        location = location_element.get_text(strip=True) if location_element else None
-        url_element = card.find('a', class_='base-card__full-link')
-        url = url_element.get('href') if url_element else None
-        date_element = card.find('time', class_='job-search-card__listdate')
-        date_posted_text = date_element.get_text(strip=True) if date_element else None
-        date_posted_iso = date_element.get('datetime') if date_element else None
-        logo_element = card.find('img', class_='artdeco-entity-image')
-        company_logo_url = logo_element.get('data-delayed-url', logo_element.get('src')) if logo_element else None
-        job_data: JobData = {
-            'title': title, 'company_name': company_name, 'company_url': company_url,
-            'company_followers_number': None, # Initialize as None
-            'location': location, 'url': url, 'date_posted_text': date_posted_text,
-            'date_posted_iso': date_posted_iso, 'company_logo_url': company_logo_url,
-        }
-        extracted_jobs.append(job_data)
-    return extracted_jobs
+        location_element = fields.get('location')
+        location = _node_text(location_element) if location_element is not None else None
+        url_element = fields.get('url')
+        url = url_element.get('href') if url_element is not None else None
+        date_element = fields.get('date')
+        date_posted_text = _node_text(date_element) if date_element is not None else None
+        date_posted_iso = date_element.get('datetime') if date_element is not None else None
+        logo_element = fields.get('logo')
+        company_logo_url = None
+        if logo_element is not None:
+            attrs = logo_element.attrib
+            company_logo_url = attrs.get('data-delayed-url') or attrs.get('src')
+        job_data = JobData(
+            title=title, company_name=company_name, company_url=company_url,
+            company_followers_number=None, # Initialize as None
+            location=location, url=url, date_posted_text=date_posted_text,
+            date_posted_iso=date_posted_iso, company_logo_url=company_logo_url,
+        )
+        _release(card)
+        yield job_data
+
+
+def _release(element: etree._Element):
+    """
+    Frees a fully processed element during iterparse: clears it and drops everything
+    parsed before it, so memory stays bounded by one card rather than the whole page.
+    """
+    element.clear()
+    while element is not None:
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+        element = parent
 
 # --- 5. Export Functions ---
-def export_to_csv(data: List[JobData], filename: str):
-    """Exports a list of job data dictionaries to a CSV file."""
-    if not data: return
+def export_to_csv(data: Iterable[JobData], filename: str) -> bool:
+    """
+    Exports job data records to a CSV file, writing rows as the iterable yields them.
+    Returns False if the file couldn't be written.
+    """
+    data = iter(data)
+    first_job = next(data, None)
+    if first_job is None: return True
+    data = itertools.chain([first_job], data)
     csv_filename = f"{filename}.csv"
-    headers = data[0].keys()
+    headers = JOB_DATA_FIELDS
+    # attrgetter pulls each row's values in C, without building an intermediate dict
+    get_row = operator.attrgetter(*headers)
     try:
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(data)
+        with open(csv_filename, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(map(get_row, data))
         print(f"✅ Data successfully exported to {csv_filename}")
-    except IOError as e: print(f"❌ Error exporting to CSV: {e}")
+        return True
+    except IOError as e:
+        print(f"❌ Error exporting to CSV: {e}")
+        return False
 
-def export_to_excel(data: List[JobData], filename: str):
-    """Exports a list of job data dictionaries to an Excel file."""
-    if not data: return
+def export_to_excel(data: Iterable[JobData], filename: str) -> bool:
+    """
+    Exports job data records to an Excel file, writing rows as the iterable yields them.
+    Returns False if the workbook couldn't be written.
+    """
+    data = iter(data)
+    first_job = next(data, None)
+    if first_job is None: return True
+    data = itertools.chain([first_job], data)
     excel_filename = f"{filename}.xlsx"
+    headers = JOB_DATA_FIELDS
+    get_row = operator.attrgetter(*headers)
+    from openpyxl import Workbook # Imported lazily so runs that never export to Excel skip its import cost
     try:
-        pd.DataFrame.from_dict(data).to_excel(excel_filename, index=False)
+        # A write-only workbook streams rows to disk instead of keeping every cell in memory
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Sheet1')
+        worksheet.append(headers)
+        for job in data:
+            worksheet.append(get_row(job))
+        workbook.save(excel_filename)
         print(f"✅ Data successfully exported to {excel_filename}")
-    except Exception as e: print(f"❌ Error exporting to Excel: {e}")
+        return True
+    except Exception as e:
+        print(f"❌ Error exporting to Excel: {e}")
+        return False
 
 # --- 6. Main Execution ---
 if __name__ == "__main__":
-    selenium_manager = None
-    try:
-        # --- Search Parameters ---
-        search_keywords = "Python"
-        search_location = "Poland"
-        time_filter = "r2592000"  # Past 24 hours
-        job_limit = 75
+    # --- Search Parameters ---
+    parser = argparse.ArgumentParser(description="Fetch, enrich and export LinkedIn job listings.")
+    parser.add_argument("--keywords", default="Python")
+    parser.add_argument("--location", default="Poland")
+    parser.add_argument("--time-filter", default="r2592000", help="LinkedIn f_TPR value, e.g. r86400 for the past 24 hours")
+    parser.add_argument("--limit", type=int, default=75)
+    parser.add_argument("--new-only", action="store_true",
+                        help=f"Skip jobs seen in earlier --new-only runs (tracked in {JOB_STORE_PATH}) and export just the new ones to a timestamped file")
+    parser.add_argument("--since", type=float, metavar="DAYS",
+                        help="With --new-only, only skip jobs first seen within the last DAYS days (default: skip all previously seen jobs)")
+    args = parser.parse_args()
+    if args.since is not None and not args.new_only:
+        parser.error("--since requires --new-only")
+    since = time.time() - args.since * 24 * 60 * 60 if args.since is not None else None
 
-        # Step 1: Fetch initial job data using requests
+    # Step 1: Fetch job data from the guest API, optionally skipping jobs seen in earlier runs
+    job_store = JobStore(JOB_STORE_PATH) if args.new_only else None
+    try:
         jobs_list = fetch_linkedin_jobs(
-            keywords=search_keywords,
-            location=search_location,
-            limit=job_limit,
-            f_TPR=time_filter
+            keywords=args.keywords,
+            location=args.location,
+            limit=args.limit,
+            f_TPR=args.time_filter,
+            job_store=job_store,
+            since=since
         )
-        print(f"\nFound {len(jobs_list)} jobs\n")
+        print(f"\nFound {len(jobs_list)} {'new ' if job_store else ''}jobs\n")
         if jobs_list:
-            # Step 2: Initialize Selenium and enrich data with followers
-            selenium_manager = SeleniumManager(debug=True)
-            enriched_jobs = enrich_jobs_with_followers(jobs_list, selenium_manager)
+            # Step 2: Enrich data with followers (Selenium is only started for uncached companies)
+            from selenium_manager import SeleniumManager as _SeleniumManager # Aliased so it doesn't shadow the type-only import
+            enriched_jobs = enrich_jobs_with_followers(
+                jobs_list,
+                # No point opening more browsers than there are companies left to scrape
+                lambda remaining: _SeleniumManager(debug=True, pool_size=min(FOLLOWER_WORKERS, remaining))
+            )
 
             # Step 3: Export the final enriched data
             print(f"\n✅ Successfully found and processed {len(enriched_jobs)} jobs.")
-            output_filename = f"linkedin_jobs_{search_keywords}_{search_location}".replace(" ", "_")
-            export_to_csv(enriched_jobs, output_filename)
-            export_to_excel(enriched_jobs, output_filename)
+            output_filename = f"linkedin_jobs_{args.keywords}_{args.location}".replace(" ", "_")
+            if job_store:
+                # Only the new jobs, so don't overwrite a full export
+                output_filename += f"_new_{datetime.now():%Y%m%d-%H%M%S}"
+            exported = export_to_csv(enriched_jobs, output_filename)
+            exported = export_to_excel(enriched_jobs, output_filename) and exported
+
+            # Step 4: Only mark the jobs as seen once they made it into the exports
+            if job_store and exported:
+                job_store.add(enriched_jobs)
+            elif job_store:
+                print("⚠️ Export failed; these jobs will be fetched again next run.")
         else:
-            print("\n❌ No jobs found.")
+            print(f"\n❌ No {'new ' if job_store else ''}jobs found.")
     finally:
-        # Step 4: Ensure the browser session is always closed
-        if selenium_manager:
-            selenium_manager.close()
\ No newline at end of file
+        if job_store:
+            job_store.close()
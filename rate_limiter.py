@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+
+def backoff_delay(attempt: int, max_delay: float = 30.0, base: float = 1.0) -> float:
+    """
+    Returns a "full jitter" backoff delay (in seconds) for a zero-based retry attempt:
+    random between 0 and base * 2**attempt, capped at max_delay. Spreading the whole
+    range keeps workers that failed together from retrying together.
+    """
+    return random.uniform(0, min(max_delay, base * 2 ** attempt))
+
+
+class RateLimiter:
+    """
+    Sliding-window rate limiter allowing at most `max_calls` calls per `period` seconds.
+    Safe to share between threads, and usable from both sync and async code.
+    """
+    def __init__(self, max_calls: int, period: float):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserves the next free call slot and returns how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and self._calls[0] <= now - self.period:
+                self._calls.popleft()
+
+            slot = now
+            if len(self._calls) >= self.max_calls:
+                slot = max(now, self._calls[-self.max_calls] + self.period)
+            self._calls.append(slot)
+            return slot - now
+
+    def wait(self):
+        """Blocks until a call is allowed."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        """Waits (without blocking the event loop) until a call is allowed."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
+import functools
 import os
-import re
+import queue
+import threading
 import time
 from typing import Optional
 
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -12,52 +13,205 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+
+from followers import parse_follower_text
+from rate_limiter import RateLimiter, backoff_delay
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Persistent Chrome profiles (one per pool session), so login cookies survive between runs
+CHROME_PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR", os.path.expanduser("~/.cache/linkedin-parser-chrome"))
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+# Follower count on a company page: logged-in link, or the logged-out info item
+_FOLLOWER_LINK_SELECTOR = 'a[aria-label*="followers" i]'
+_INFO_ITEM_SELECTOR = 'div.org-top-card-summary-info-list__info-item'
+# Finds the follower text in the browser in one round-trip: the logged-in link's
+# aria-label, else the logged-out info item mentioning "followers"
+_FOLLOWER_TEXT_JS = '''
+const link = document.querySelector('%s');
+if (link) return link.getAttribute('aria-label');
+for (const item of document.querySelectorAll('%s')) {
+    if (/followers/i.test(item.innerText)) return item.innerText;
+}
+return null;
+''' % (_FOLLOWER_LINK_SELECTOR, _INFO_ITEM_SELECTOR)
+# Resolves as soon as a selector matches, notified by DOM mutations instead of polling
+_WAIT_FOR_SELECTOR_JS = '''
+const [selector, timeoutMs, done] = arguments;
+if (document.querySelector(selector)) return done(true);
+const observer = new MutationObserver(() => {
+    if (document.querySelector(selector)) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(true);
+    }
+});
+const timer = setTimeout(() => { observer.disconnect(); done(false); }, timeoutMs);
+observer.observe(document, {childList: true, subtree: true});
+'''
+# Inline errors LinkedIn shows when it rejects the submitted credentials
+_LOGIN_ERROR_SELECTOR = '#error-for-username, #error-for-password'
+# Where LinkedIn sends logins that need a human to verify them
+_CHALLENGE_PATH = "/checkpoint/challenge"
+# Only the HTML is read, so the browser doesn't need to download these (or run trackers)
+_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.css", "*.woff", "*.woff2", "*.ttf",
+    "*doubleclick*", "*google-analytics*",
+]
+
+def _profiled(method):
+    """
+    Runs the method under the calling thread's pyinstrument profiler when the PROFILE
+    environment variable is set; reports are written by SeleniumManager.close().
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self._thread_profiler()
+        if profiler is None or profiler.is_running:
+            return method(self, *args, **kwargs)
+        profiler.start()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if profiler.is_running: # close() may already have stopped it
+                profiler.stop()
+    return wrapper
+
+def _wait(driver: webdriver.Chrome, timeout: float) -> WebDriverWait:
+    """
+    An explicit wait polling every 100 ms (instead of 500 ms), which treats elements
+    re-rendered mid-check as not ready yet.
+    """
+    return WebDriverWait(driver, timeout, poll_frequency=0.1, ignored_exceptions=(StaleElementReferenceException,))
+
 class SeleniumManager:
-    """Manages a single, reusable, logged-in Selenium browser session."""
-    def __init__(self, debug: bool = False):
+    """Manages a pool of reusable, logged-in Selenium browser sessions."""
+    def __init__(self, debug: bool = False, pool_size: int = 1, requests_per_minute: int = 30):
         self.username = os.getenv("LINKEDIN_USER")
         self.password = os.getenv("LINKEDIN_PASS")
 
         if not self.username or not self.password:
             raise ValueError("LINKEDIN_USER and LINKEDIN_PASS must be set in your .env file.")
 
+        self.debug = debug
+        self.pool_size = pool_size
+        # pyinstrument only samples the thread that started it, so there's one profiler per thread
+        self._profilers = {} if os.getenv("PROFILE") else None
+        self._profilers_lock = threading.Lock()
+        # Shared across all workers so the overall request rate doesn't grow with pool_size
+        self.rate_limiter = RateLimiter(requests_per_minute, 60)
+        self.drivers = []
+        self._available_drivers = queue.Queue()
+        try:
+            for i in range(pool_size):
+                # Chrome locks a profile directory, so each session gets its own
+                driver = self._create_driver(os.path.join(CHROME_PROFILE_DIR, f"profile_{i}"))
+                self.drivers.append(driver)
+                # Only the first session logs in; the rest reuse its cookies unless that fails
+                if i == 0:
+                    self.login(driver)
+                elif not self._share_login(self.drivers[0], driver):
+                    # _share_login already found this session logged out
+                    self.login(driver, check_session=False)
+                self._available_drivers.put(driver)
+        except BaseException:
+            # The caller never gets the manager to close, so don't leave the started browsers running
+            self.close()
+            raise
+        self.driver = self.drivers[0]
+
+    def _create_driver(self, user_data_dir: Optional[str] = None) -> webdriver.Chrome:
+        """Starts a new Chrome session, optionally on a persistent profile directory."""
         chrome_options = Options()
-        if not debug:
+        if not self.debug:
             chrome_options.add_argument("--headless")
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+        if user_data_dir:
+            chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+        chrome_options.add_argument(f"user-agent={USER_AGENT}")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-extensions")
+        # Return from navigation at DOMContentLoaded; we wait explicitly for what we need
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
         service = Service()
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        print("🚀 Headless browser session started.")
-        self.login()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        try:
+            driver.implicitly_wait(0) # Only explicit waits, so they aren't stretched by an implicit timeout
+            driver.set_script_timeout(30) # Longer than any in-page wait, which times out by itself
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+        except BaseException:
+            # Not in self.drivers yet, so close() wouldn't reach it
+            driver.quit()
+            raise
+        print(f"🚀 Headless browser session started ({len(self.drivers) + 1}/{self.pool_size}).")
+        return driver
 
-    def login(self):
+    @_profiled
+    def login(self, driver: Optional[webdriver.Chrome] = None, check_session: bool = True):
         """
         Logs into LinkedIn using explicit waits and a retry mechanism.
-        It will attempt to log in up to 3 times on failure.
+        It will attempt to log in up to 3 times on failure. Pass check_session=False
+        to skip checking for an existing session first.
         """
+        driver = driver or self.driver
+        if check_session and self._is_logged_in(driver):
+            print("✅ Already logged in (saved browser profile).")
+            return
+
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 print(f"🔐 Attempting to log into LinkedIn (Attempt {attempt + 1}/{max_retries})...")
-                self.driver.get("https://www.linkedin.com/login")
-                
-                # Wait up to 15 seconds for the username field to be visible
-                wait = WebDriverWait(self.driver, 15)
-                username_field = wait.until(EC.visibility_of_element_located((By.ID, "username")))
+                driver.get("https://www.linkedin.com/login")
                 
+                # Wait up to 15 seconds for the username field to be visible, unless LinkedIn
+                # redirects to the feed because this session is already logged in
+                wait = _wait(driver, 15)
+                wait.until(EC.any_of(EC.visibility_of_element_located((By.ID, "username")), EC.url_contains("/feed")))
+                if "/feed" in driver.current_url:
+                    print("✅ Already logged in.")
+                    return
+                username_field = driver.find_element(By.ID, "username")
+
                 # Enter credentials and click sign in
                 username_field.send_keys(self.username)
-                self.driver.find_element(By.ID, "password").send_keys(self.password)
-                self.driver.find_element(By.XPATH, '//button[@type="submit"]').click()
+                driver.find_element(By.ID, "password").send_keys(self.password)
+                driver.find_element(By.XPATH, '//button[@type="submit"]').click()
+
+                # Wait for the feed (a successful login), a credentials error or a verification challenge.
+                # A rejected password is re-rendered under /checkpoint/lg/login-submit, so only
+                # /checkpoint/challenge counts as a verification step.
+                wait.until(EC.any_of(
+                    EC.url_contains("/feed"),
+                    EC.visibility_of_element_located((By.CSS_SELECTOR, ".global-nav")),
+                    EC.visibility_of_element_located((By.CSS_SELECTOR, _LOGIN_ERROR_SELECTOR)),
+                    EC.url_contains(_CHALLENGE_PATH),
+                ))
+                login_errors = [e.text for e in driver.find_elements(By.CSS_SELECTOR, _LOGIN_ERROR_SELECTOR) if e.text]
+                if login_errors:
+                    # Wrong credentials won't get better on retry
+                    print(f"❌ LinkedIn rejected the credentials: {login_errors[0]}")
+                    break
+                if _CHALLENGE_PATH in driver.current_url:
+                    # A verification challenge needs a human; retrying would only trigger more
+                    if not self.debug:
+                        print("❌ LinkedIn asked for a security verification. Run once with debug=True to complete it.")
+                        break
+                    print("🔐 Complete the security verification in the browser window...")
+                    try:
+                        _wait(driver, 300).until(EC.url_contains("/feed"))
+                    except TimeoutException:
+                        print("❌ The security verification wasn't completed in time.")
+                        break
 
-                # Wait for the main navigation to appear, which confirms a successful login
-                wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, ".global-nav")))
-                
                 # If we reach here, login was successful
                 print("✅ Login successful!")
                 return # Exit the function on success
@@ -65,73 +219,136 @@ class SeleniumManager:
             except Exception as e:
                 print(f"❌ Login attempt {attempt + 1} failed. Error: {e}")
                 if attempt < max_retries - 1:
-                    print("    - Retrying in 3 seconds...")
-                    time.sleep(3) # Wait before the next attempt
+                    delay = backoff_delay(attempt)
+                    print(f"    - Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay) # Back off before the next attempt
         
         # If the loop completes without a successful login, raise an error.
         print("❌ All login attempts failed.")
         self.close()
         raise Exception("Could not log into LinkedIn after multiple attempts.")
 
-    def _parse_follower_text(self, text: str) -> Optional[int]:
+    def _on_login_wall(self, driver: webdriver.Chrome) -> bool:
+        """Checks whether the driver was redirected to LinkedIn's sign-in page."""
+        try:
+            current_url = driver.current_url
+        except WebDriverException:
+            return False
+        return "/login" in current_url or "/authwall" in current_url
+
+    def _is_logged_in(self, driver: webdriver.Chrome) -> bool:
+        """Checks whether the driver's session is logged in by opening the feed."""
+        try:
+            driver.get("https://www.linkedin.com/feed/")
+            # Same 15-second budget as a fresh login, so a slow feed isn't mistaken for a logged-out session
+            _wait(driver, 15).until(EC.any_of(
+                EC.visibility_of_element_located((By.CSS_SELECTOR, ".global-nav")),
+                EC.url_contains("/login"),
+                EC.url_contains("/authwall"),
+            ))
+            return not self._on_login_wall(driver)
+        except WebDriverException: # Includes TimeoutException
+            return False
+
+    def _share_login(self, source: webdriver.Chrome, target: webdriver.Chrome) -> bool:
         """
-        Parses text like "1.2K followers" or "100M followers" into an integer.
+        Copies the session cookies of a logged-in driver into another driver, so it
+        doesn't have to log in again. Returns True if the target ends up logged in.
         """
-        text = text.lower().replace('followers', '').strip()
-        text = text.replace(',', '')
-        
-        multiplier = 1
-        if 'k' in text:
-            multiplier = 1000
-            text = text.replace('k', '')
-        elif 'm' in text:
-            multiplier = 1000000
-            text = text.replace('m', '')
-        
         try:
-            number = float(text)
-            return int(number * multiplier)
-        except ValueError:
+            # Cookies can only be added for the domain the browser is currently on
+            target.get("https://www.linkedin.com/")
+            for cookie in source.get_cookies():
+                try:
+                    target.add_cookie(cookie)
+                except WebDriverException:
+                    pass # Cookies for other (sub)domains can't be set from here
+        except Exception as e:
+            print(f"    - Could not reuse login session, logging in instead. Error: {e}")
+            return False
+        if not self._is_logged_in(target):
+            print("    - Could not reuse login session, logging in instead.")
+            return False
+        print("✅ Reused login session.")
+        return True
+
+    def _thread_profiler(self):
+        """Returns the calling thread's profiler, or None when profiling is off."""
+        if self._profilers is None:
             return None
+        with self._profilers_lock:
+            profiler = self._profilers.get(threading.get_ident())
+            if profiler is None:
+                try:
+                    from pyinstrument import Profiler # Only needed when profiling
+                except ImportError:
+                    print("⚠️ PROFILE is set but pyinstrument isn't installed (pip install pyinstrument). Profiling is off.")
+                    self._profilers = None
+                    return None
+                profiler = self._profilers[threading.get_ident()] = Profiler(async_mode='disabled')
+            return profiler
+
+    def _write_profiles(self):
+        """Writes one HTML report per profiled thread (prof.html, prof_1.html, ...)."""
+        current_profiler = self._profilers.get(threading.get_ident())
+        if current_profiler is not None and current_profiler.is_running:
+            # close() was called from inside a profiled method, e.g. after a failed login
+            current_profiler.stop()
+        for i, profiler in enumerate(self._profilers.values()):
+            if profiler.is_running:
+                continue # Still sampling another thread, which only that thread can stop
+            filename = "prof.html" if i == 0 else f"prof_{i}.html"
+            profiler.write_html(filename)
+            print(f"📊 Profile written to {filename}")
+        self._profilers.clear()
+
+    def _wait_for_selector(self, driver: webdriver.Chrome, selector: str, timeout: float):
+        """
+        Waits inside the page, with a MutationObserver, until an element matches the CSS
+        selector: one round-trip instead of polling. Raises TimeoutException otherwise.
+        """
+        if not driver.execute_async_script(_WAIT_FOR_SELECTOR_JS, selector, int(timeout * 1000)):
+            raise TimeoutException(f"No element matched {selector!r} within {timeout} seconds.")
+
+    def _navigate(self, driver: webdriver.Chrome, url: str, timeout: float = 15):
+        """
+        Navigates via CDP Page.navigate, which returns once the new document is committed
+        instead of waiting for the full load like driver.get. Callers then wait explicitly
+        for the elements they need.
+        """
+        old_root = driver.find_element(By.TAG_NAME, "html")
+        result = driver.execute_cdp_cmd("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise WebDriverException(f"Navigation to {url} failed: {result['errorText']}")
+        # Don't let the caller's wait match an element on the page we're leaving
+        _wait(driver, timeout).until(EC.staleness_of(old_root))
 
-    def get_followers(self, company_url: str) -> Optional[int]:
+    @_profiled
+    def get_followers(self, company_url: str, driver: Optional[webdriver.Chrome] = None) -> Optional[int]:
         """
         Navigates to a company page and scrapes the follower count. It will retry
         up to 3 times on failure, especially for long loading times.
         """
         if not company_url:
             return None
+        driver = driver or self.driver
 
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                self.driver.get(company_url)
+                self._navigate(driver, company_url)
 
-                # Wait up to 15 seconds for the key element to appear
-                wait = WebDriverWait(self.driver, 15)
-                wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "org-top-card-summary-info-list__info-item")))
-                
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                text_to_parse = None
-                
-                # Priority 1 (Logged-in): Find the <a> tag with an aria-label containing "followers"
-                follower_link = soup.find('a', attrs={'aria-label': re.compile(r'followers', re.IGNORECASE)})
-                
-                if follower_link:
-                    text_to_parse = follower_link['aria-label']
-                else:
-                    # Fallback (Logged-out): Find the specific info div
-                    follower_div = soup.find(
-                        'div',
-                        class_='org-top-card-summary-info-list__info-item',
-                        string=re.compile(r'followers', re.IGNORECASE)
-                    )
-                    if follower_div:
-                        text_to_parse = follower_div.get_text()
+                # Wait up to 15 seconds for either follower element to appear
+                self._wait_for_selector(driver, f"{_FOLLOWER_LINK_SELECTOR}, {_INFO_ITEM_SELECTOR}", 15)
+                # The count is rendered; cut off the trackers and prefetches still loading
+                driver.execute_cdp_cmd("Page.stopLoading", {})
+
+                # Logged-in aria-label first, then the logged-out info item
+                text_to_parse = driver.execute_script(_FOLLOWER_TEXT_JS)
 
                 # If text was found, parse it and return successfully
                 if text_to_parse:
-                    followers = self._parse_follower_text(text_to_parse)
+                    followers = parse_follower_text(text_to_parse)
                     if followers is not None:
                         return followers # Success! Exit the function.
                 
@@ -143,17 +360,39 @@ class SeleniumManager:
             except Exception as e:
                 print(f"    - An unexpected error occurred on attempt {attempt + 1}/{max_retries}: {e}")
 
+            # A redirect can surface as a timeout, a "document unloaded" script error or a missing element
+            if self._on_login_wall(driver):
+                # Redirected to sign in; reloading the page won't help
+                print(f"    - Redirected to the login wall for {company_url}.")
+                return None
+
             # If this wasn't the last attempt, wait before retrying
             if attempt < max_retries - 1:
                 print("    - Retrying...")
-                time.sleep(2) # A short delay between retries
+                time.sleep(backoff_delay(attempt)) # Back off exponentially between retries
 
         # If all retries fail, return None
         print(f"    - All retries failed for {company_url}.")
         return None
     
+    def get_followers_pooled(self, company_url: str) -> Optional[int]:
+        """
+        Thread-safe variant of get_followers: borrows an idle browser from the pool for
+        the duration of the lookup. Calls are rate-limited across the whole pool.
+        """
+        driver = self._available_drivers.get()
+        try:
+            self.rate_limiter.wait()
+            return self.get_followers(company_url, driver)
+        finally:
+            self._available_drivers.put(driver)
+
     def close(self):
-        """Closes the browser session."""
-        if self.driver:
-            self.driver.quit()
-            print("\nBrowser session closed.")
\ No newline at end of file
+        """Closes all browser sessions, writing profiling reports if PROFILE is set."""
+        for driver in self.drivers:
+            driver.quit()
+        if self.drivers:
+            self.drivers = []
+            print("\nBrowser session closed.")
+        if self._profilers:
+            self._write_profiles()
\ No newline at end of file
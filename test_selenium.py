@@ -7,35 +7,42 @@ and extract the number of followers.
 
 # --- 1. Dependencies ---
 # Make sure to install these libraries first:
-# pip install selenium beautifulsoup4
+# pip install selenium python-dotenv requests lxml
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 from typing import Optional
+import argparse
 import re
-import time
 from dotenv import load_dotenv
 from selenium_manager import SeleniumManager
 
 if __name__ == "__main__":
-    # Define the company page you want to scrape
+    # Company page scraped when no URLs are given
     target_url = "https://uk.linkedin.com/school/calyptus-web3/?trk=public_jobs_jserp-result_job-search-card-subtitle"
     target_url = "https://www.linkedin.com/company/solhelix?trk=public_jobs_jserp-result_job-search-card-subtitle"
+
+    parser = argparse.ArgumentParser(description="Scrape the follower counts of LinkedIn company pages.")
+    parser.add_argument("urls", nargs="*", default=[target_url], help="company page URLs (all share one browser session)")
+    parser.add_argument("--hold", action="store_true", help="keep the browser open until Enter is pressed")
+    args = parser.parse_args()
+
     manager = None
     try:
         # 1. Create the manager (this also starts the browser and logs in)
         manager = SeleniumManager(debug=True)
         
-        # 2. Get the follower count
-        follower_count = manager.get_followers(target_url)
+        for url in args.urls:
+            # 2. Get the follower count, reusing the same browser for every URL
+            follower_count = manager.get_followers(url)
 
-        # 3. Print the final result
-        if follower_count is not None:
-            print(f"\n📈 Result: The company has {follower_count} followers.")
-        else:
-            print("\n❌ Could not retrieve the follower count.")
-        time.sleep(1000)
+            # 3. Print the final result
+            if follower_count is not None:
+                print(f"\n📈 Result: {url} has {follower_count} followers.")
+            else:
+                print(f"\n❌ Could not retrieve the follower count for {url}.")
+        if args.hold:
+            input("Press Enter to close the browser...")
     finally:
         # 4. Ensure the browser is always closed
         if manager: